@@ -1,9 +1,8 @@
+import math
+
 import numpy as np
 import pandas as pd
 
-# IO
-from adapter.i_o import IO
-
 from prioritization.label_map import Labels
 
 import logging
@@ -81,22 +80,28 @@ class PriorityWeights(object):
             For Example: log_level = logging.ERROR will only throw error
             messages and ignore INFO, DEBUG and WARNING.
 
-            Default: logging.DEBUG
+            Default: None, the log level is left unchanged
     """
     def __init__(
         self,
         priority_weight_dfs,
         random_index,
-        log_level=logging.DEBUG):
+        log_level=None):
 
         # set log level
         self.log_level = log_level
-        logging.getLogger().setLevel(log_level)
+        if log_level is not None:
+            logging.getLogger().setLevel(log_level)
     
         self.l = Labels().set_ahp()
 
         self.random_index = random_index
 
+        # random index looked up by the priority matrix order
+        self.random_index_by_order = dict(zip(
+            random_index[self.l['pr_mtrx_ord']].astype(int),
+            random_index[self.l['ri']].astype(float)))
+
         self.layer_category = dict()
 
         # extract layer 2, 1, and 0 category label
@@ -109,13 +114,25 @@ class PriorityWeights(object):
         self.layer_category[0] = priority_weight_dfs[
                     'layer_0'].columns[0].split("/")[0]
 
+        # priority score and weight column labels for each layer
+        self.score_col = {
+            layer_number : label + " " + self.l['pr_score']
+            for layer_number, label in self.layer_category.items()}
+
+        self.wgt_col = {
+            layer_number : label + " " + self.l['pr_wgt']
+            for layer_number, label in self.layer_category.items()}
+
+        self.final_wgt_col = self.l['final'] + " " + self.l['pr_wgt']
+
         self.priority_weight_dfs=priority_weight_dfs
 
     def calc_priority_score_and_weight(
         self,
         df,
         df_key,
-        drop_priority_ratings=True):
+        drop_priority_ratings=True,
+        check_consistency=True):
         """Performs the following steps for any priority rating
         input table:
         
@@ -157,6 +174,14 @@ class PriorityWeights(object):
 
                 Default: True
 
+            check_consistency: boolean
+                If True, checks the consistency of the priority
+                ratings. Set to False if the consistency gets
+                checked for a number of tables at once, see
+                check_priority_matrices_consistency.
+
+                Default: True
+
         Returns:
 
             res: dictionary
@@ -182,6 +207,10 @@ class PriorityWeights(object):
 
                 'corner_index' : string
                     Upper left corner index
+
+                'priority_responses' : np.array
+                    Square array of priority ratings with the
+                    lower triangle populated
         """
         # check columns and values in the first column 
         # are the same
@@ -195,106 +224,205 @@ class PriorityWeights(object):
             log.error(msg)
             raise ValueError(msg)
         else:
-            rating_columns = list(df.copy().columns.values[1:])
-            corner_index = df.copy().columns[0]
+            rating_columns = list(df.columns[1:])
+            corner_index = df.columns[0]
+
+        res = self.calc_priority_scores(
+            df.iloc[:,1:].to_numpy(),
+            corner_index,
+            df_key,
+            check_consistency=check_consistency)
+
+        # upper layer labels first, from the top layer down,
+        # followed by the entities rated in the table
+        priority_weights = dict(res['layer_labels'])
+        priority_weights[res['layer']] = rating_columns
+
+        if not drop_priority_ratings:
+            priority_weights.update(
+                zip(rating_columns, res['priority_responses'].T))
+
+        priority_weights[self.score_col[res['layer_number']]] = \
+            res['priority_scores']
+
+        priority_weights[self.wgt_col[res['layer_number']]] = \
+            res['priority_weights']
+
+        df = pd.DataFrame(priority_weights)
+
+        res = {
+            'priority_weights' : df,
+            'corner_index' : corner_index,
+            'priority_responses' : res['priority_responses']
+        }
+
+        return res
+
+    def calc_priority_scores(
+        self,
+        priority_ratings,
+        corner_index,
+        df_key,
+        check_consistency=True):
+        """Calculates priority scores and priority weights from
+        a square array of priority ratings, as found in a priority
+        rating input table without the first column. Checks that
+        the diagonal carries ones, populates the lower triangle as
+        the inverse of the upper triangle, and, optionally, checks
+        the consistency of the ratings.
+
+        Parameters:
+
+            priority_ratings: np.array
+                A square array of priority ratings. Only the
+                diagonal and the upper triangle are read.
+
+            corner_index: string
+                Upper left corner index of the priority rating
+                table, identifying its position in the prioritization
+                hierarchy.
+
+            df_key: string
+                Name of the priority rating table.
+
+            check_consistency: boolean
+                If True, checks the consistency of the priority
+                ratings.
 
+                Default: True
+
+        Returns:
+
+            res: dictionary
+                With the following keys:
+
+                'priority_responses': np.array
+                    Square array of priority ratings with the
+                    lower triangle populated
+
+                'priority_scores': np.array
+                    Priority score of each rated entity
+
+                'priority_weights': np.array
+                    Priority weight of each rated entity, that is
+                    the normalized priority score
+
+                'layer': string
+                    Label of the layer whose entities are rated
+
+                'layer_number': integer
+                    Number of the layer whose entities are rated
+
+                'layer_labels': dict
+                    Maps the labels of any upper layers, from the
+                    top layer down, to the upper layer entities
+                    that the rated entities belong to
+        """
         # check diagonal carries ones
-        priority_responses = np.array(
-            df.iloc[:,1:])
-        if not \
-            (1 == pd.Series(
-                [priority_responses[i,i] for i in range(
-                    len(priority_responses))]
-                )
-                ).all():
-
-                msg = "Values along the priority rating matrix "\
+        if not np.all(np.diag(priority_ratings) == 1.):
+
+            msg = "Values along the priority rating matrix "\
                 "diagonal in input table {} "\
                 "should all equal 1, and some or all values appear to have "\
                 "other values. Please double-check and correct it in the "\
                 "input file.".format(df_key)
 
-                log.error(msg)
-                raise ValueError(msg)
-
-        # populate lower triangle with 1/upper triangle
-        for r in range(len(priority_responses)):
-            for c in range(len(priority_responses)):
-                if r>c:
-                    priority_responses[r,c] = 1./priority_responses[c,r]
-
-        df.iloc[:,1:] = priority_responses
+            log.error(msg)
+            raise ValueError(msg)
 
-        score_lbl_key = 3 - len(corner_index.split("/"))
+        # read the diagonal and the upper triangle into a single
+        # float array
+        priority_responses = np.empty(priority_ratings.shape)
+        upper_triangle = np.triu_indices(len(priority_responses))
+        priority_responses[upper_triangle] = priority_ratings[upper_triangle]
 
-        layer_label_prefix = self.layer_category[score_lbl_key] + " "
+        priority_scores, priority_weights, eigenvalue = \
+            self.calc_priority_vectors(priority_responses)
 
-        # the score is a geometric mean
-        df[layer_label_prefix + self.l['pr_score']] = \
-            np.prod(priority_responses, axis=1)**(1./len(priority_responses))
+        if check_consistency:
+            self.check_priority_matrix_consistency(
+                priority_responses,
+                eigenvalue,
+                df_key)
 
-        self.check_priority_matrix_consistency(
-            priority_responses.astype(float), 
-            df_key)
+        # split the corner index if in layer 0 or 1, to learn what
+        # is(are) the upper layer(s)
+        corner_labels = corner_index.split("/")
+        score_lbl_key = 3 - len(corner_labels)
 
-        # split first column if in layer 0 or 1, to learn what is(are) the 
-        # upper layer(s)
-        i = 1.
-        if len(corner_index.split("/"))>1.:
-            for lbl in corner_index.split("/"):
-                if lbl==self.layer_category[score_lbl_key]:
-                    df[lbl] = df[corner_index].copy()
-                    cols = list(df.copy().columns.values)
-                    df = df.loc[:,cols[-1:] + cols[:-1]]
-                else:
-                    df[self.layer_category[
-                        score_lbl_key + i]] = lbl
-                    cols = list(df.copy().columns.values)
-                    df = df.loc[:,cols[-1:] + cols[:-1]]
-                    i+=1.
-
-            df = df.drop(columns=corner_index)
-
-        df = self.calc_priority_weight(df,layer_label_prefix)
-
-        if drop_priority_ratings:
-            df = df.drop(columns=rating_columns)
+        layer_labels = dict()
+        for i in range(len(corner_labels) - 1, 0, -1):
+            layer_labels[self.layer_category[
+                score_lbl_key + i]] = corner_labels[i]
 
         res = {
-            'priority_weights' : df,
-            'corner_index' : corner_index
+            'priority_responses' : priority_responses,
+            'priority_scores' : priority_scores,
+            'priority_weights' : priority_weights,
+            'layer' : self.layer_category[score_lbl_key],
+            'layer_number' : score_lbl_key,
+            'layer_labels' : layer_labels
         }
 
         return res
 
-    # between numeric inputs, or as min-max among all scenarios
-    # linear fit
-    def calc_priority_weight(
-        self,
-        df,
-        layer_label_prefix):
-        """Calculates the priority weights as the 
-        normalized priority score.
+    @staticmethod
+    def calc_priority_vectors(
+        priority_responses):
+        """Numerical core of the priority calculation, free of
+        any table handling. Populates the lower triangle of the
+        priority responses as the inverse of the upper triangle,
+        and calculates the priority scores, the priority weights,
+        and the estimate of the principal eigenvalue.
+
+        Accepts a single square array, or a stack of square
+        arrays of the same order, in which case all results
+        are calculated for each array in the stack at once.
 
         Parameters:
 
-            df: pandas dataframe
-                A rating dataframe containing the 
-                calculated priority score.
+            priority_responses: np.array
+                Float array of priority responses, of shape
+                (order, order) or (count, order, order), with the
+                diagonal and the upper triangle populated. The
+                lower triangle gets populated in place.
+
+        Returns:
+
+            priority_scores: np.array
+                Row geometric means of the priority responses
+
+            priority_weights: np.array
+                Normalized priority scores
 
-            layer_label_prefi: string
-                Label of the lowerst layer attribute 
-                represented in the priority rating table.
+            eigenvalue: float or np.array
+                Estimated principal eigenvalue, as the mean of the
+                ratios between the priority responses multiplied
+                with the priority weights and the weights themselves
         """
-        df[layer_label_prefix + self.l["pr_wgt"]] = \
-            df[layer_label_prefix + self.l["pr_score"]]/\
-                df[layer_label_prefix + self.l["pr_score"]].sum()
+        # populate lower triangle with 1/upper triangle
+        upper_triangle = np.triu_indices(priority_responses.shape[-1], 1)
+        priority_responses[..., upper_triangle[1], upper_triangle[0]] = \
+            1./priority_responses[..., upper_triangle[0], upper_triangle[1]]
+
+        # the score is a geometric mean, calculated as the exponent
+        # of the mean logarithm to avoid overflowing the row product
+        priority_scores = np.exp(np.log(priority_responses).mean(axis=-1))
+
+        # the weight is the normalized score
+        priority_weights = priority_scores/\
+            priority_scores.sum(axis=-1, keepdims=True)
+
+        eigenvalue = (np.einsum(
+            '...ij,...j->...i', priority_responses, priority_weights)/\
+                priority_weights).mean(axis=-1)
 
-        return df
+        return priority_scores, priority_weights, eigenvalue
 
     def check_priority_matrix_consistency(
         self, 
         priority_scores_array,
+        eigenvalue,
         df_key,
         consistency_threshold=0.5): # *mg gracefully increased the threshold
         """Ensures a priority matrix is consistent.
@@ -302,11 +430,19 @@ class PriorityWeights(object):
         Thomas L. Saaty - The Analytic Hierarchy Process: 
         Decision Making In Complex Environments.
 
+        The principal eigenvalue of the priority matrix is
+        the estimate returned by calc_priority_vectors, as in
+        the batched check_priority_matrices_consistency.
+
         Parameters:
 
             priority_scores_array: np.array
                 A square array of priority responses
 
+            eigenvalue: float
+                Estimated principal eigenvalue of the priority
+                responses, as returned by calc_priority_vectors
+
             df_key: string
                 Key associated with the priority scores array
 
@@ -315,19 +451,10 @@ class PriorityWeights(object):
                 be higher than this treshold, the matrix will
                 be deemed as inconsistent.
         """
-        
-        eigenvalue = np.linalg.eigvals(priority_scores_array)[0]
-        consistency_index = (eigenvalue - len(priority_scores_array))/\
-            (len(priority_scores_array) - 1)
-
-        if consistency_index==0:
-            inconsistency_ratio=0.0
-        else:
-            inconsistency_ratio = (consistency_index*100)/\
-                (100*self.random_index.loc[
-                    self.random_index[
-                        self.l["pr_mtrx_ord"]]==len(priority_scores_array),
-                    self.l['ri']].reset_index(drop=True)[0])
+        inconsistency_ratio = self.calc_inconsistency_ratio(
+            eigenvalue,
+            len(priority_scores_array),
+            df_key)
 
         if inconsistency_ratio>consistency_threshold:
             msg = "Priority ratings assigned in input table {} "\
@@ -339,6 +466,108 @@ class PriorityWeights(object):
 
         return True
 
+    def check_priority_matrices_consistency(
+        self,
+        priority_responses,
+        consistency_threshold=0.5):
+        """Ensures that a number of priority matrices are
+        consistent, as in check_priority_matrix_consistency.
+        Matrices of the same order are stacked, and their
+        principal eigenvalues estimated all at once.
+
+        Parameters:
+
+            priority_responses: dict of np.arrays
+                Square arrays of priority responses, with the
+                lower triangle populated, keyed by the names of
+                the priority rating tables
+
+            consistency_threshold: float
+                If the matrix inconsistency is calculated to
+                be higher than this treshold, the matrix will
+                be deemed as inconsistent.
+        """
+        df_keys_by_order = dict()
+        for df_key in priority_responses:
+            df_keys_by_order.setdefault(
+                len(priority_responses[df_key]), []).append(df_key)
+
+        for order, df_keys in df_keys_by_order.items():
+
+            priority_scores_arrays = np.stack(
+                [priority_responses[df_key] for df_key in df_keys])
+
+            _, _, eigenvalues = self.calc_priority_vectors(
+                priority_scores_arrays)
+
+            inconsistency_ratios = self.calc_inconsistency_ratio(
+                eigenvalues,
+                order,
+                ", ".join(df_keys))
+
+            if (inconsistency_ratios>consistency_threshold).any():
+                msg = "Priority ratings assigned in input table(s) {} "\
+                    "might be inconsistent. Please revise the ratings, or "\
+                    "alternatively and with caution, increase the consistency "\
+                    "threshold.".format(", ".join(
+                        np.array(df_keys)[
+                            inconsistency_ratios>consistency_threshold]))
+                log.error(msg)
+                raise ValueError(msg)
+
+        return True
+
+    def calc_inconsistency_ratio(
+        self,
+        eigenvalue,
+        order,
+        df_key):
+        """Calculates the inconsistency ratio, that is the
+        consistency index relative to the random index, of
+        priority matrices of the same order.
+
+        Parameters:
+
+            eigenvalue: float or np.array
+                Principal eigenvalue of each priority matrix
+
+            order: integer
+                Order of the priority matrices
+
+            df_key: string
+                Name(s) of the priority rating table(s)
+
+        Returns:
+
+            inconsistency_ratio: float or np.array
+                Inconsistency ratio of each priority matrix
+        """
+        consistency_index = (np.asarray(eigenvalue) - order)/(order - 1)
+
+        # the estimate carries a floating point error, which would
+        # otherwise get amplified by the zero random index at order 2
+        consistent = np.isclose(consistency_index, 0.)
+
+        if consistent.all():
+            return np.zeros_like(consistency_index)
+
+        if order not in self.random_index_by_order:
+            msg = "The random index table does not provide the average "\
+                "consistency index for a priority matrix of order {}, "\
+                "needed to check the consistency of input table(s) {}. "\
+                "Please add it to the random index table.".format(
+                    order, df_key)
+            log.error(msg)
+            raise ValueError(msg)
+
+        with np.errstate(divide='ignore'):
+            inconsistency_ratio = np.where(
+                consistent,
+                0.,
+                consistency_index/self.random_index_by_order[order])
+
+        return inconsistency_ratio
+
     def calculate(self):
         """Performs the calculation of layer 2 
         and overall priority weights for all
@@ -381,9 +610,7 @@ class PriorityWeights(object):
                     attribute, populated with one exhaustive set of 
                     layer 0 attributes
                     - a final priority weight
-                    column with values summing to one
-                    - additional columns holding various layer-specific
-                    intermediary scores and weights.
+                    column with values summing to one.
 
                 'layer_0_label': string
                     Name of the layer 0 attribute, as provided
@@ -398,7 +625,9 @@ class PriorityWeights(object):
                     in the input file.
         """
         priority_weighted_inputs = dict()
+        priority_responses = dict()
         layer_weights = dict()
+        seen_corner_indices = set()
 
         for key in self.priority_weight_dfs:
 
@@ -406,18 +635,16 @@ class PriorityWeights(object):
                 self.calc_priority_score_and_weight(
                     self.priority_weight_dfs[key],
                     key,
-                    drop_priority_ratings=True
+                    drop_priority_ratings=True,
+                    check_consistency=False
                     )
+
+            priority_responses[key] = res['priority_responses']
             
             priority_weighted_inputs[key] = \
                 res['priority_weights']
             
-            try: 
-                unique_corner_indices += [res['corner_index']]
-            except: 
-                unique_corner_indices = [res['corner_index']]
-
-            if len(set(unique_corner_indices))!=len(unique_corner_indices):
+            if res['corner_index'] in seen_corner_indices:
                 msg = 'Duplicate input table corner index found in {}.'\
                     "The priority rating hierarchy is incomplete"\
                     " and needs to be repaired in the input tables.".\
@@ -425,6 +652,8 @@ class PriorityWeights(object):
                 log.error(msg)
                 raise ValueError(msg)
 
+            seen_corner_indices.add(res['corner_index'])
+
             if key=='layer_2':
                 layer_weights[
                         self.layer_category[2]] = \
@@ -444,51 +673,96 @@ class PriorityWeights(object):
                         self.layer_category[layer_number]][key] = \
                         priority_weighted_inputs[key]
 
-                    if 'compiled' not in layer_weights[
-                        self.layer_category[layer_number]].keys():
-                        
-                        layer_weights[
-                        self.layer_category[layer_number]]['compiled'] = \
-                            priority_weighted_inputs[key]
+        # check consistency of all priority ratings at once
+        self.check_priority_matrices_consistency(priority_responses)
+
+        # compile the layer 1 and layer 0 weights with a single
+        # concatenation per layer
+        for layer_number in [1, 0]:
+            layer_weights[
+                self.layer_category[layer_number]]['compiled'] = \
+                pd.concat(list(layer_weights[
+                    self.layer_category[layer_number]].values()),
+                    axis = 0, ignore_index=True)
+
+        # integer codes of the entities at each layer, such that
+        # the weights can be placed into dense arrays indexed by
+        # the layer 2, layer 1, and layer 0 entities
+        layer_2_weights = layer_weights[self.layer_category[2]]
+        layer_1_weights = layer_weights[self.layer_category[1]]['compiled']
+        layer_0_weights = layer_weights[self.layer_category[0]]['compiled']
+
+        entities = {
+            2 : pd.Categorical(layer_2_weights[self.layer_category[2]]),
+            1 : pd.Categorical(layer_1_weights[self.layer_category[1]]),
+            0 : pd.Categorical(layer_0_weights[self.layer_category[0]]),
+        }
 
-                    else:
-                        layer_weights[
-                        self.layer_category[layer_number]]['compiled'] = \
-                            pd.concat([layer_weights[
-                        self.layer_category[layer_number]]['compiled'],
-                            priority_weighted_inputs[key]], axis = 0)
-
-        # layer 0 weights per each entity in layer 1
-        weights_per_top_layer_entities = layer_weights[
-            self.layer_category[0]
-        ]['compiled'].merge(
-            layer_weights[self.layer_category[1]]['compiled'], how = 'left', 
-            on=[self.layer_category[2], self.layer_category[1]])
-
-        weights_per_top_layer_entities[self.l["pr_wgt"]] = \
-            weights_per_top_layer_entities[
-                self.layer_category[0] + " " + self.l["pr_wgt"]] * \
-            weights_per_top_layer_entities[
-                self.layer_category[1] + " " + self.l["pr_wgt"]]       
+        # for each layer, codes of the entities of that layer and
+        # of all the layers above it, from the top layer down
+        codes = dict()
+        for layer_number, df in [
+            (2, layer_2_weights),
+            (1, layer_1_weights),
+            (0, layer_0_weights)]:
+
+            codes[layer_number] = tuple(pd.Categorical(
+                df[self.layer_category[upper_layer_number]],
+                categories=entities[upper_layer_number].categories).codes
+                for upper_layer_number in range(2, layer_number - 1, -1))
+
+            if np.any([(c < 0).any() for c in codes[layer_number]]):
+                msg = "Some layer {} priority rating tables refer to upper "\
+                    "layer entities that are not rated in the upper layer "\
+                    "tables. The priority rating hierarchy is incomplete "\
+                    "and needs to be repaired in the input tables.".format(
+                        layer_number)
+                log.error(msg)
+                raise ValueError(msg)
 
-        # final layer 0 weights (considering both layer 1 and layer 2 opinions)
-        final_weights = weights_per_top_layer_entities.merge(
-            layer_weights[self.layer_category[2]], how = 'left', 
-            on=[self.layer_category[2]]
-            )
+        layer_2_wgt = np.zeros(len(entities[2].categories))
+        layer_2_wgt[codes[2]] = layer_2_weights[self.wgt_col[2]]
 
-        final_weights[self.l["final"] + " " + self.l["pr_wgt"]] = \
-            final_weights[self.l["pr_wgt"]] * \
-            final_weights[self.layer_category[2] + " " + self.l["pr_wgt"]]
+        layer_1_wgt = np.zeros(
+            (len(entities[2].categories), len(entities[1].categories)))
+        layer_1_scr = np.zeros_like(layer_1_wgt)
+        layer_1_wgt[codes[1]] = layer_1_weights[self.wgt_col[1]]
+        layer_1_scr[codes[1]] = layer_1_weights[self.score_col[1]]
 
-        
+        layer_0_wgt = np.zeros(
+            layer_1_wgt.shape + (len(entities[0].categories),))
+        layer_0_wgt[codes[0]] = layer_0_weights[self.wgt_col[0]]
 
-        final_weights = final_weights.groupby(
-            [self.layer_category[0]]).sum().reset_index()
+        # layer 0 weights per each entity in layer 2
+        layer_0_wgt_per_layer_2 = layer_1_wgt[:, :, np.newaxis] * layer_0_wgt
 
-        final_weights = final_weights.drop(columns=[
-            self.layer_category[2],self.layer_category[1]
-        ])
+        # final layer 0 weights (considering both layer 1 and layer 2 opinions)
+        final_wgt = np.einsum(
+            'k,kji->i', layer_2_wgt, layer_0_wgt_per_layer_2)
+
+        layer_1_codes = codes[0][:2]
+
+        # layer labels are categorical, sharing the categories among
+        # the weight tables, so that downstream merges and groupbys
+        # operate on the integer codes rather than on the strings
+        weights_per_top_layer_entities = layer_0_weights.assign(**{
+            self.layer_category[layer_number] : \
+                pd.Categorical.from_codes(
+                    layer_codes, entities[layer_number].categories)
+            for layer_number, layer_codes in zip([2, 1, 0], codes[0])
+        }).assign(**{
+            self.score_col[1] : layer_1_scr[layer_1_codes],
+            self.wgt_col[1] : layer_1_wgt[layer_1_codes],
+            self.l["pr_wgt"] : \
+                layer_0_wgt_per_layer_2[codes[0]],
+        })
+
+        final_weights = pd.DataFrame({
+            self.layer_category[0] : pd.Categorical.from_codes(
+                np.arange(len(entities[0].categories)),
+                entities[0].categories),
+            self.final_wgt_col : final_wgt,
+        })
 
         metric_weights = {
             'weights_per_top_layer_entities': weights_per_top_layer_entities,
@@ -498,20 +772,23 @@ class PriorityWeights(object):
             'layer_2_label': self.layer_category[2],
         }
 
-        if not np.all(np.all(
-            weights_per_top_layer_entities.groupby(
-                self.layer_category[2]).sum()[
-                    self.l["pr_wgt"]].values) ==np. array([1.,1.])):
-                msg = "Priority weights do not sum to 1 for each top level category."\
-                    " Please double check inputs."
-                log.error(msg)
-                raise Exception(msg)
+        # unobserved layer 2 entities are kept on purpose: their
+        # weights sum to zero and get reported below
+        group_sums = weights_per_top_layer_entities.groupby(
+            self.layer_category[2], sort=False, observed=False)[
+                self.l["pr_wgt"]].sum().to_numpy()
 
-        if not final_weights[
-            self.l["final"] + " " + self.l["pr_wgt"]].sum().round(5)==1.:
-                msg = "Final priority weights do not sum to 1. Please double-check inputs."
-                log.error(msg)
-                raise Exception(msg)
+        if not np.allclose(group_sums, 1., atol=1e-8):
+            msg = "Priority weights do not sum to 1 for each top level category."\
+                " Please double check inputs."
+            log.error(msg)
+            raise ValueError(msg)
+
+        if not math.isclose(
+            final_weights[self.final_wgt_col].sum(), 1., abs_tol=1e-8):
+            msg = "Final priority weights do not sum to 1. Please double-check inputs."
+            log.error(msg)
+            raise ValueError(msg)
 
         return metric_weights
 
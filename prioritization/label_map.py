@@ -2,6 +2,19 @@ import logging
 
 log = logging.getLogger(__name__)
 
+# advanced hierarchy process (AHP) labels, defined once
+# and shared by all Labels instances
+_AHP_LABELS = {
+    "pr_score" : "Priority Score",
+    "pr_wgt" : "Priority Weight",
+    "pr_mtrx_ord" : "Priority Matrix Order",
+    "ri" : "Average Consistency Index",
+    "final" : "Final",
+    # table names and substrings
+    'random_index' : 'random_index',
+    'layer_' : 'layer_'
+}
+
 
 class Labels(object):
     """Maps input table headers to shorter strings
@@ -14,19 +27,21 @@ class Labels(object):
 
     def __init__(
         self,
-        log_level=logging.DEBUG,
+        log_level=None,
     ):
         """Constructs the label class.
 
         Parameters:
 
-            log_level : logging object
-                Sets log level. Default: logging.DEBUG
+            log_level : None or logging object
+                Sets log level. If None, the log level
+                is left unchanged. Default: None
         """
 
         # set log level
         self.log_level = log_level
-        logging.getLogger().setLevel(log_level)
+        if log_level is not None:
+            logging.getLogger().setLevel(log_level)
 
     def set_scoring(self):
         """Defines scaling labels.
@@ -55,18 +70,9 @@ class Labels(object):
 
     def set_ahp(self):
         """Defines advanced hierarchy process (AHP)
-        labels.
+        labels, shared among all instances.
         """
-        self.ahp = {
-            "pr_score" : "Priority Score",
-            "pr_wgt" : "Priority Weight",
-            "pr_mtrx_ord" : "Priority Matrix Order",
-            "ri" : "Average Consistency Index",
-            "final" : "Final",
-            # table names and substrings
-            'random_index' : 'random_index',
-            'layer_' : 'layer_'
-        }
+        self.ahp = _AHP_LABELS
 
         return self.ahp
 
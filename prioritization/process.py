@@ -3,12 +3,9 @@ import re
 from datetime import datetime
 from platform import python_version
 
-import adapter
-# import numpy as np
+import numpy as np
 import pandas as pd
 # import scipy.stats as ss
-# IO
-from adapter.i_o import IO
 
 import prioritization
 from prioritization.label_map import Labels
@@ -180,6 +177,11 @@ class Prioritizer(object):
         self.sco_l = Labels().set_scoring()
         self.res_l = Labels().set_results()
 
+        # final priority weight and final weighted score column labels
+        self.final_wgt_col = self.ahp_l["final"] + " " + self.ahp_l['pr_wgt']
+        self.final_wgtd_score_col = \
+            self.ahp_l["final"] + " " + self.res_l['wgtd_score']
+
         # start timer
         self.start_time = datetime.now()
 
@@ -187,12 +189,10 @@ class Prioritizer(object):
         self.log_level = log_level
         logging.getLogger().setLevel(log_level)
         # log versions
-        log.info("Python version: {}".format(python_version()))
-
-        log.info("CFH task 4 prioritization package version: {}".format(
-            prioritization.__version__))
+        log.info("Python version: %s", python_version())
 
-        log.info("Adapter package version: {}".format(adapter.__version__))
+        log.info("CFH task 4 prioritization package version: %s",
+            prioritization.__version__)
 
         self.inpath = inpath
 
@@ -203,6 +203,11 @@ class Prioritizer(object):
         self.writeout = writeout
         self.create_plots = create_plots
 
+        # weights and weighted scores do not depend on the
+        # ranking parameters and are calculated only once
+        # for each set of inputs
+        self.precomputed = False
+
         self.set_up_inputs()
 
         self.number_of_ranking_bins = number_of_ranking_bins
@@ -227,15 +232,25 @@ class Prioritizer(object):
         * creates and saves plots that represent various
           steps in the calculation, including the weighted scored
           option quntifiers, as well as the final scores
+
+        The weights and the final scores are kept between calls,
+        so that repeated calls, for example with a different
+        number_of_ranking_bins or ranking_bin_labels, only repeat
+        the ranking. Setting up the inputs again, or calling
+        reset_cache, recalculates them.
         """
 
-        self.calculate_weights()
+        if not self.precomputed:
+
+            self.calculate_weights()
+
+            self.score_results()
 
-        self.score_results()
+            self.weigh_scored_results()
 
-        self.weigh_scored_results()
+            self.calculate_final_scores()
 
-        self.calculate_final_scores()
+            self.precomputed = True
 
         self.rank(
             number_of_ranking_bins=self.number_of_ranking_bins,
@@ -250,6 +265,14 @@ class Prioritizer(object):
             self.plot_evaluation_results()
 
 
+    def reset_cache(self):
+        """Discards the weights and the final scores kept from
+        a previous calculate call, such that the next call
+        recalculates them.
+        """
+        self.precomputed = False
+
+
     def read_inputs(self,
         writeout,
         os_mapping={'win32': 'W:', 'darwin': '/Volumes/ees',
@@ -284,6 +307,17 @@ class Prioritizer(object):
                         'linux': '/media/ees'}
         """
 
+        # the adapter is only needed to read the inputs
+        import adapter
+        from adapter.i_o import IO
+
+        log.info("Adapter package version: %s", adapter.__version__)
+
+        if not isinstance(writeout, bool):
+            msg = "The writeout kwarg should be a boolean, got {}."
+            log.error(msg.format(writeout))
+            raise ValueError(msg.format(writeout))
+
         try:
 
             self.data_connection = IO(
@@ -293,29 +327,34 @@ class Prioritizer(object):
                 create_db=True,
                 db_flavor="sqlite",
                 close_db=False,
-                skip_writeout=~writeout
+                skip_writeout=not writeout
             )
 
             self.inputs = self.data_connection["tables_as_dict_of_dfs"]
 
-        except:
+        except (OSError, KeyError, ValueError) as e:
             msg = "Failed to read input tables from {}."
 
-            log.error(msg.format(self.inpath))
-            raise ValueError(msg.format(self.inpath))
+            log.error(msg.format(self.inpath), exc_info=True)
+            raise ValueError(msg.format(self.inpath)) from e
 
 
     def set_up_inputs(self):
         """Extracts appropriate inputs to result scoring and
-        weights calculation.
+        weights calculation, and discards any weights and
+        final scores calculated from previous inputs.
         """
-        self.weights_inputs = dict()
+        layer_tag = self.ahp_l['layer_']
+
+        self.weights_inputs = {
+            key : df for key, df in self.inputs.items() if layer_tag in key}
 
-        for key in self.inputs.keys():
+        self.layer_2_table = self.weights_inputs[layer_tag + '2']
 
-            if self.ahp_l['layer_'] in key:
-                self.weights_inputs[key]=\
-                    self.inputs[key]
+        # the final weighted scores are divided among the layer 2
+        # entities when weighing the scored results
+        self.count_layer_2_entities = self.layer_2_table.shape[0]
+        self.inv_count_layer_2_entities = 1. / self.count_layer_2_entities
 
         self.ahp_ri = self.inputs[
             self.ahp_l["random_index"]]
@@ -324,6 +363,8 @@ class Prioritizer(object):
         self.score_limit_df = self.inputs[
             self.sco_l['score_range']]
 
+        self.reset_cache()
+
 
     def score_results(self):
         """Applies the functionality
@@ -364,8 +405,7 @@ class Prioritizer(object):
             self.ahp_ri
             ).calculate()
 
-        for key in self.weights.keys():
-            setattr(self, key, self.weights[key])
+        self.__dict__.update(self.weights)
 
 
     def weigh_scored_results(self):
@@ -374,48 +414,76 @@ class Prioritizer(object):
         """
         self.scores_and_weights = dict()
 
+        # layer 0 labels of the scored results and of the weights
+        # share a single categorical dtype, such that the join
+        # and the lookup below operate on the integer codes
+        layer_0_dtype = pd.CategoricalDtype(
+            self.final_weights[self.layer_0_label].cat.categories.union(
+                self.scored_results_long[self.layer_0_label].unique()))
+
+        self.scored_results_long[self.layer_0_label] = \
+            self.scored_results_long[self.layer_0_label].astype(
+                layer_0_dtype)
+
+        for weights in [
+            self.weights_per_top_layer_entities, self.final_weights]:
+            weights[self.layer_0_label] = \
+                weights[self.layer_0_label].astype(layer_0_dtype)
+
+        # the weights, one row per layer 2 entity for each layer 0
+        # entity, are joined on their layer 0 label index
         self.scores_and_weights['long'] = \
-            self.scored_results_long.merge(
-            self.weights_per_top_layer_entities,
+            self.scored_results_long.join(
+            self.weights_per_top_layer_entities.set_index(
+                self.layer_0_label),
             on=self.layer_0_label,
             how='left'
-        ).merge(self.final_weights.loc[
-            :, [self.layer_0_label,
-                self.ahp_l["final"] + " " + self.ahp_l['pr_wgt']]],
-            on=self.layer_0_label,
-            how='left'
-        )
+        ).reset_index(drop=True)
 
-        self.scores_and_weights['long'][
-            self.res_l['wgtd_score']] = \
-            self.scores_and_weights['long'][
-            self.ahp_l['pr_wgt']] * \
-            self.scores_and_weights['long'][self.sco_l['fnl_score']]
+        # final weights hold a single row per layer 0 entity, and
+        # are looked up by the layer 0 label codes instead of merged
+        final_weights = self.final_weights.set_index(
+            self.layer_0_label)[self.final_wgt_col].reindex(
+                layer_0_dtype.categories).to_numpy()
 
-        count_layer_2_entities = self.weights_inputs[
-            self.ahp_l['layer_'] + '2'].shape[0]
+        self.scores_and_weights['long'][self.final_wgt_col] = \
+            final_weights[self.scores_and_weights['long'][
+                self.layer_0_label].cat.codes.to_numpy()]
+
+        final_scores = self.scores_and_weights['long'][
+            self.sco_l['fnl_score']].to_numpy(dtype=float)
 
         self.scores_and_weights['long'][
-            self.ahp_l["final"] + " " + self.res_l['wgtd_score']] = \
+            self.res_l['wgtd_score']] = np.multiply(
+            self.scores_and_weights['long'][
+                self.ahp_l['pr_wgt']].to_numpy(), final_scores)
+
+        final_weighted_scores = np.multiply(
+            self.scores_and_weights['long'][self.final_wgt_col].to_numpy(),
+            final_scores)
+        final_weighted_scores *= self.inv_count_layer_2_entities
+
+        self.scores_and_weights['long'][self.final_wgtd_score_col] = \
+            final_weighted_scores
+
+        # the weighted scores are indexed directly by the columns
+        # of the long table, without copying a narrow table first.
+        # Unstacking sorts the index, so the index levels are set in
+        # the desired row order and only reordered afterwards, which
+        # avoids sorting the pivoted table again
+        weighted_scores = pd.Series(
             self.scores_and_weights['long'][
-                self.ahp_l["final"] + " " + self.ahp_l['pr_wgt']] * \
-            self.scores_and_weights['long'][self.sco_l['fnl_score']]/\
-                count_layer_2_entities
-
-        df=self.scores_and_weights[
-            'long'].loc[:, [
-                self.layer_2_label, self.layer_1_label,self.layer_0_label,
-                self.sco_l['sce'], self.sco_l['options'],
-                self.res_l['wgtd_score']
-            ]]
-
-        self.scores_and_weights['pivoted'] = df.pivot(
-                values=self.res_l['wgtd_score'],
-                index=df.columns.drop(
-                    [self.sco_l['options'],self.res_l['wgtd_score']]),
-                columns=self.sco_l['options']).reset_index().sort_values(
-                    [self.layer_2_label,self.sco_l['sce'],self.layer_1_label]
-                )
+                self.res_l['wgtd_score']].to_numpy(),
+            index=pd.MultiIndex.from_arrays([
+                self.scores_and_weights['long'][label] for label in [
+                    self.layer_2_label, self.sco_l['sce'],
+                    self.layer_1_label, self.layer_0_label,
+                    self.sco_l['options']]]))
+
+        self.scores_and_weights['pivoted'] = weighted_scores.unstack(
+            self.sco_l['options']).reorder_levels(
+                [self.layer_2_label, self.layer_1_label, self.layer_0_label,
+                 self.sco_l['sce']]).reset_index()
 
 
     def calculate_final_scores(self):
@@ -426,24 +494,30 @@ class Prioritizer(object):
         self.scores_and_weights_top_layer = dict()
 
         self.scores_and_weights_top_layer['long'] = \
-            (self.scores_and_weights['long'].groupby(
+            self.scores_and_weights['long'].groupby(
                 [self.layer_0_label,
                  self.layer_1_label,
                  self.sco_l['sce'],
-                self.sco_l['options']]).agg(
-            {self.ahp_l["final"] + " " + self.res_l['wgtd_score'] : 'sum'})).\
-                reset_index()
+                self.sco_l['options']],
+                sort=False, as_index=False, observed=True)[
+            self.final_wgtd_score_col].sum()
+
+        # grouping without sorting reorders the categories of the
+        # categorical keys by appearance, restore the shared order
+        for label in [self.layer_0_label, self.layer_1_label]:
+            self.scores_and_weights_top_layer['long'][label] = \
+                self.scores_and_weights_top_layer['long'][
+                    label].cat.set_categories(
+                        self.scores_and_weights['long'][
+                            label].cat.categories)
 
         self.scores_and_weights_top_layer['pivoted'] = \
             self.scores_and_weights_top_layer['long'].pivot(
-            values=self.ahp_l["final"] + " " + self.res_l['wgtd_score'],
+            values=self.final_wgtd_score_col,
                 columns=self.sco_l['options'],
             index=[self.layer_1_label, self.layer_0_label, self.sco_l['sce']]).\
-                reset_index().sort_values(
-                    [self.sco_l['sce'],self.layer_1_label]).\
-                        reset_index()#.drop(
-                    # columns=[self.layer_1_label]
-                # )
+                sort_index(level=[self.sco_l['sce'],self.layer_1_label]).\
+                    reset_index()
 
 
     def rank(
@@ -497,65 +571,133 @@ class Prioritizer(object):
 
         # sum and rank weighted scores
 
-        # sum Weighted Scores in each scenario and from each
-        # standpoint, for each of the options, and then
+        # sum Weighted Scores and Final Weighted Scores in each
+        # scenario and from each standpoint, for each of the
+        # options, in a single pass over the long table
+        summed = self.scores_and_weights['long'].groupby(
+            [self.sco_l['sce'],self.layer_2_label,self.sco_l['options']],
+            sort=False, observed=True)[
+                [self.res_l['wgtd_score'], self.final_wgtd_score_col]].sum()
+
         # rank the options within each sceanario and standpoint
         # from highest scored to lowest scored ones
-        self.scores_and_weights['summed_and_ranked'] = self.\
-            scores_and_weights['long'].loc[
-                :,[self.sco_l['sce'],self.sco_l['options'],
-                  self.layer_2_label,self.res_l['wgtd_score']]
-                  ].groupby(
-                    [self.sco_l['sce'],self.layer_2_label,self.sco_l['options']]
-                    ).sum(
-                ).reset_index().sort_values(
-                    by=[
-                    self.sco_l['sce'],self.layer_2_label,self.res_l['wgtd_score']],
-                    ascending=[True, True, False])
-
-
-        # sum Final Weighted Scores in each scenario
-        # for each of the options, and then
-        # rank the options within each scenario
-        self.scores_and_weights_top_layer['summed_and_ranked'] = self.\
-            scores_and_weights_top_layer['long'].loc[
-                :,[self.sco_l['sce'], self.sco_l['options'],
-                  self.ahp_l["final"] + " " + self.res_l['wgtd_score']]
-                  ].groupby(
-                    [self.sco_l['sce'],self.sco_l['options']]
-                    ).sum(
-                ).reset_index().sort_values(
-                    by=[
-                    self.sco_l['sce'],
-                    self.ahp_l["final"] + " " + self.res_l['wgtd_score']
-                    ],
-                    ascending=[True, False])
+        self.scores_and_weights['summed_and_ranked'] = summed[
+            self.res_l['wgtd_score']].reset_index()
+
+        self.scores_and_weights['summed_and_ranked'][self.layer_2_label] = \
+            self.scores_and_weights['summed_and_ranked'][
+                self.layer_2_label].cat.set_categories(
+                    self.scores_and_weights['long'][
+                        self.layer_2_label].cat.categories)
+
+        # two stable sorts, by the descending score and then by
+        # the ascending group keys, rank within each group
+        self.scores_and_weights['summed_and_ranked'] = \
+            self.scores_and_weights['summed_and_ranked'].sort_values(
+                self.res_l['wgtd_score'], ascending=False, kind='mergesort'
+            ).sort_values(
+                [self.sco_l['sce'],self.layer_2_label], kind='mergesort')
+
+        # further sum Final Weighted Scores over the standpoints
+        # and rank the options within each scenario
+        self.scores_and_weights_top_layer['summed_and_ranked'] = summed[
+            self.final_wgtd_score_col].groupby(
+                level=[self.sco_l['sce'],self.sco_l['options']],
+                sort=False).sum().reset_index(
+                ).sort_values(
+                    self.final_wgtd_score_col,
+                    ascending=False, kind='mergesort'
+                ).sort_values(self.sco_l['sce'], kind='mergesort')
+
+        scores = self.scores_and_weights['summed_and_ranked'][
+            self.res_l['wgtd_score']].to_numpy()
+
+        scores_top_layer = self.scores_and_weights_top_layer[
+            'summed_and_ranked'][self.final_wgtd_score_col].to_numpy()
 
         if lower_ranking_limit_0:
-            bins = (self.scores_and_weights[
-                'summed_and_ranked'][self.res_l['wgtd_score']].max()/3)*range(
-                    number_of_ranking_bins + 1)
-            bins_top_layer = (self.scores_and_weights_top_layer[
-                'summed_and_ranked'][
-                    self.ahp_l["final"] + " " + self.res_l['wgtd_score']].max(
-                    )/3)*range(number_of_ranking_bins + 1)
+            bins = np.linspace(
+                0., scores.max(), number_of_ranking_bins + 1)
+            bins_top_layer = np.linspace(
+                0., scores_top_layer.max(), number_of_ranking_bins + 1)
         else:
             bins = bins_top_layer = number_of_ranking_bins
 
         self.scores_and_weights_top_layer['summed_and_ranked'][
-            self.res_l['bin']] = pd.cut(
-            self.scores_and_weights_top_layer['summed_and_ranked'][
-                self.ahp_l["final"] + " " + self.res_l['wgtd_score']],
+            self.res_l['bin']] = self.bin_scores(
+                scores_top_layer,
                 bins_top_layer,
-                labels = ranking_bin_labels)
+                ranking_bin_labels)
 
         self.scores_and_weights['summed_and_ranked'][
-            self.res_l['bin']] = pd.cut(
-            self.scores_and_weights['summed_and_ranked'][
-                self.res_l['wgtd_score']],
+            self.res_l['bin']] = self.bin_scores(
+                scores,
                 bins,
-                labels = ranking_bin_labels)
+                ranking_bin_labels)
+
+    @staticmethod
+    def bin_scores(
+        scores,
+        bins,
+        labels):
+        """Assigns scores to right-closed rating bins, matching
+        the behavior of pandas.cut with the given labels, using
+        a binary search over the bin edges.
+
+        Parameters:
+
+            scores: numpy array
+                Final scores to be rated
+
+            bins: integer or numpy array
+                Unique, monotonically increasing bin edges, or the count of
+                equidistant bins between the minimum and the maximum
+                score. In the latter case, the lowest edge is extended
+                by 0.1% of the score range to include the minimum score.
+
+            labels: list of strings
+                Labels of the bins, from the lowest to the highest
+
+        Returns:
+
+            binned_scores: pandas categorical
+                Ordered categorical with a label for each score,
+                missing for scores outside of the bins
+        """
+        scores = np.asarray(scores, dtype=float)
+
+        if np.ndim(bins) == 0:
+            min_score = scores.min()
+            max_score = scores.max()
+
+            if min_score == max_score:
+                adjustment = 0.001 * abs(min_score) if min_score != 0 \
+                    else 0.001
+                bins = np.linspace(
+                    min_score - adjustment, max_score + adjustment,
+                    bins + 1)
+            else:
+                bins = np.linspace(min_score, max_score, bins + 1)
+                bins[0] -= 0.001 * (max_score - min_score)
+
+        else:
+            bins = np.asarray(bins, dtype=float)
+
+            # as in pandas.cut, the binary search requires
+            # unique and increasing bin edges
+            if (np.diff(bins) <= 0).any():
+                msg = "Bin edges must be unique and increase "\
+                    "monotonically, got {}."
+                log.error(msg.format(bins))
+                raise ValueError(msg.format(bins))
+
+        codes = np.searchsorted(bins, scores, side='left') - 1
+        codes[(codes < 0) | (codes >= len(labels))] = -1
+
+        binned_scores = pd.Categorical.from_codes(
+            codes, categories=labels, ordered=True)
 
+        return binned_scores
 
     def plot_evaluation_results(self):
         """Plots intermediary and final evaluation results.
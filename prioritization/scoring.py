@@ -1,8 +1,5 @@
 import numpy as np
 import pandas as pd
-import scipy.stats as ss
-# IO
-from adapter.i_o import IO
 
 from prioritization.label_map import Labels
 
@@ -47,27 +44,60 @@ class MetricScore(object):
             For Example: log_level = logging.ERROR will only throw error
             messages and ignore INFO, DEBUG and WARNING.
 
-            Default: logging.DEBUG
+            Default: None, the log level is left unchanged
     """
     def __init__(
         self,
         scoring_df,
         score_limit_df,
         layer_0_label,
-        log_level=logging.DEBUG,
+        log_level=None,
     ):
 
         # set log level
         self.log_level = log_level
-        logging.getLogger().setLevel(log_level)
+        if log_level is not None:
+            logging.getLogger().setLevel(log_level)
 
         self.l = Labels().set_scoring()
         self.layer_0_label = layer_0_label
         self.score_limit_df=score_limit_df
 
+        self.options_res_cols = self.get_options_res_cols(scoring_df)
+
         self.scoring_df = self.determine_limits(
             scoring_df)
 
+        # the option results are cast to float once, score_results
+        # reads them from the table along with the filters and the
+        # global weights
+        self.scoring_df[self.options_res_cols] = \
+            self.scoring_df[self.options_res_cols].astype(np.float64, copy=False)
+
+    def get_options_res_cols(
+        self,
+        scoring_df):
+        """Finds the option quantification result columns,
+        which are all columns other than the scenario, the
+        layer 0 entity, the filters and the global weight.
+
+        Parameters:
+
+            scoring_df: pandas dataframe
+                A scoring table, see determine_limits
+
+        Returns:
+
+            options_res_cols: pandas index
+                Labels of the option quantification result columns
+        """
+        options_res_cols = scoring_df.columns.drop(
+                [self.l['sce'],self.layer_0_label,
+                 self.l['hifi'],self.l['lofi'],self.l['glob_wgt']]
+                 )
+
+        return options_res_cols
+
     def determine_limits(
         self,
         scoring_df):
@@ -77,6 +107,10 @@ class MetricScore(object):
         the final accross the scenarios low and
         high filter value for each layer 0 entity.
 
+        The rows with the filters set to min or max are
+        kept as boolean arrays in the lofi_is_min and
+        hifi_is_max attributes.
+
         Parameters:
 
             scoring_df: pandas dataframe
@@ -98,52 +132,52 @@ class MetricScore(object):
                 A table that replaces any instances of 'min' and 'max'
                 strings with the actual filters determined based
                 on the quantification results for all options
-                and scenarios.
+                and scenarios. Only the filter columns are newly
+                allocated.
         """
 
-        max_over_scenarios = scoring_df.groupby(
-            [self.layer_0_label]).max(
-                numeric_only=True).reset_index()
+        # the options of the given table, which may differ
+        # from those of the table passed on initialization
+        options_res_cols = self.get_options_res_cols(scoring_df)
 
-        max_over_scenarios['max ' + self.l['hifi']] = \
-            max_over_scenarios.iloc[:,1:].max(axis=1)
+        # minimum and maximum quantification result among the
+        # options and across all scenarios for each layer 0
+        # entity, broadcast back to the rows of that entity.
+        # The limits are mapped back by label, so the groups
+        # need not be sorted
+        options_by_layer_0 = scoring_df.groupby(
+            self.layer_0_label, sort=False, observed=True)[
+                options_res_cols]
 
-        max_over_scenarios = max_over_scenarios.drop(
-            columns=max_over_scenarios.columns.drop(
-                [self.layer_0_label,'max ' + self.l['hifi']])
-        )
+        min_over_scenarios = scoring_df[self.layer_0_label].map(
+            options_by_layer_0.min().min(axis=1)).to_numpy()
 
-        min_over_scenarios = scoring_df.groupby(
-            [self.layer_0_label]).min(
-                numeric_only=True).reset_index()
+        max_over_scenarios = scoring_df[self.layer_0_label].map(
+            options_by_layer_0.max().max(axis=1)).to_numpy()
 
-        min_over_scenarios['min ' + self.l['lofi']] = \
-            min_over_scenarios.iloc[:,1:].min(axis=1)
+        # a shallow copy shares the data of the unchanged columns,
+        # the filter columns are replaced rather than overwritten
+        scoring_df_filters = scoring_df.copy(deep=False)
 
-        min_over_scenarios = min_over_scenarios.drop(
-            columns=min_over_scenarios.columns.drop(
-                [self.layer_0_label,'min ' + self.l['lofi']])
-        )
+        # rows with filters set to 'min' or 'max', the strings
+        # are masked out such that the filters cast to float
+        self.lofi_is_min = (
+            scoring_df[self.l['lofi']]==self.l['min']).to_numpy()
 
-        scoring_df_w_min_and_max = scoring_df.merge(
-            max_over_scenarios, on=[self.layer_0_label],
-            how='left'
-        ).merge(
-            min_over_scenarios, on=[self.layer_0_label],
-            how='left'
-        )
-
-        scoring_df_filters = scoring_df.copy()
+        self.hifi_is_max = (
+            scoring_df[self.l['hifi']]==self.l['max']).to_numpy()
 
         scoring_df_filters[self.l['lofi']]=np.where(
-            scoring_df_w_min_and_max[self.l['lofi']]==self.l['min'],
-            scoring_df_w_min_and_max['min ' + self.l['lofi']],
-            scoring_df_w_min_and_max[self.l['lofi']])
+            self.lofi_is_min,
+            min_over_scenarios,
+            scoring_df[self.l['lofi']].mask(self.lofi_is_min).to_numpy(
+                dtype=np.float64))
 
         scoring_df_filters[self.l['hifi']]=np.where(
-            scoring_df_w_min_and_max[self.l['hifi']]==self.l['max'],
-            scoring_df_w_min_and_max['max ' + self.l['hifi']],
-            scoring_df_w_min_and_max[self.l['hifi']])
+            self.hifi_is_max,
+            max_over_scenarios,
+            scoring_df[self.l['hifi']].mask(self.hifi_is_max).to_numpy(
+                dtype=np.float64))
 
         return scoring_df_filters
 
@@ -153,65 +187,77 @@ class MetricScore(object):
         lofi,
         value,
         minscore,
-        maxscore):
+        maxscore,
+        out=None):
         """Scores values linearly between a low
         and the high limit, on a scale ranging
         from the given minimum and maximum limit.
 
+        All arguments can be either scalars or
+        numpy arrays of matching shapes.
+
         Parameters:
 
-            hifi: integer or float
+            hifi: integer, float or numpy array
                 High value filter
 
-            lofi: integer or float
+            lofi: integer, float or numpy array
                 Low value filter
 
-            value: integer or float
+            value: integer, float or numpy array
                 Value of the quantification result
 
-            minscore: integer
+            minscore: integer or numpy array
                 Minimum score
 
-            maxscore: integer
+            maxscore: integer or numpy array
                 Maximum score
 
+            out: None or numpy array
+                Float array of the broadcast shape of the
+                arguments to write the scores into, for
+                example to reuse it between calls.
+
+                Default: None, a new array is allocated
+
         Returns:
 
-            mapped_score: float
+            mapped_score: float or numpy array
                 Linearly mapped score, between the
                 minimum and the maximum score, proportional
                 to the distances between the value and the
-                value filters.
+                value filters. Where the high and the low
+                value filter coincide, the minimum score.
         """
-        value = min(hifi,value)
-        value = max(lofi,value)
-        # between numeric inputs, or as min-max
-        # among all scenarios linear fit
-        mapped_score = minscore + \
-            (maxscore - minscore) * \
-                ((value - lofi)/(hifi-lofi))
+        # score per unit of value, computed once for each
+        # filter pair rather than for each value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(
+                np.equal(hifi, lofi),
+                0.,
+                np.subtract(maxscore, minscore) / np.subtract(hifi, lofi))
 
-        return mapped_score
-
-
-    def apply_global_weight(
-        self):
-        """Applies the global weight that amplifies
-        or attenuates chosen layer 0 entities.
-
-        Returns:
+        # between numeric inputs, or as min-max
+        # among all scenarios linear fit, computed
+        # in place in a single output array
+        if out is None:
+            mapped_score = np.empty(
+                np.broadcast(hifi, lofi, value, minscore, maxscore).shape)
+        else:
+            mapped_score = out
 
-            True - upon completion
-        """
-        self.scoring_df_long[self.l['fnl_score']] = \
-            self.scoring_df_long[self.l['lin_score']] * \
-                self.scoring_df_long[self.l['glob_wgt']]
+        np.minimum(hifi, value, out=mapped_score)
+        np.maximum(lofi, mapped_score, out=mapped_score)
+        np.subtract(mapped_score, lofi, out=mapped_score)
+        np.multiply(mapped_score, slope, out=mapped_score)
+        np.add(mapped_score, minscore, out=mapped_score)
 
-        return True
+        return mapped_score[()]
 
 
     def score_results(self,
-        decimals_in_scores=0):
+        decimals_in_scores=0,
+        return_shape='both'):
         """Scores the quantification
         results for all options and scenarios.
 
@@ -227,47 +273,93 @@ class MetricScore(object):
                 Number of decimal places in the scored results.
 
                 Default: 0.
+
+            return_shape: string
+                Shape of the returned scored results, 'wide'
+                for a column per option, 'long' for a row per
+                option, or 'both'. Only the requested tables
+                are built. Without the long shape, the
+                scoring_df_long attribute is set to None.
+
+                Default: 'both'.
+
+        Returns:
+
+            res: dict
+                The wide scored results under the 'scored_results'
+                key and the long scored results under the
+                'scored_results_long' key, as requested.
         """
+        if return_shape not in ['wide', 'long', 'both']:
+            msg = "The return_shape kwarg should be 'wide', 'long' "\
+                "or 'both', got {}."
+            log.error(msg.format(return_shape))
+            raise ValueError(msg.format(return_shape))
 
-        options_res_cols = self.scoring_df.columns.drop(
-                [self.l['sce'],self.layer_0_label,
-                 self.l['hifi'],self.l['lofi'],self.l['glob_wgt']]
-                 )
+        # the score limits are common to all rows and are
+        # broadcast as scalars rather than stored as columns
+        min_score = float(self.score_limit_df.loc[0, self.l['min_score']])
+
+        max_score = float(self.score_limit_df.loc[0, self.l['max_score']])
+
+        # score all options at once as a matrix with a row for
+        # each scenario and layer 0 entity and a column per option
+        linear_scores = self.linear_map(
+            self.scoring_df[self.l['hifi']].to_numpy()[:, np.newaxis],
+            self.scoring_df[self.l['lofi']].to_numpy()[:, np.newaxis],
+            self.scoring_df[self.options_res_cols].to_numpy(
+                dtype=np.float64),
+            min_score,
+            max_score,
+            )
+
+        np.round(linear_scores, decimals_in_scores, out=linear_scores)
+
+        # the global weight amplifies or attenuates
+        # chosen layer 0 entities
+        final_scores = np.multiply(
+            linear_scores,
+            self.scoring_df[self.l['glob_wgt']].to_numpy()[:, np.newaxis])
+
+        res = dict()
+
+        if return_shape in ['wide', 'both']:
+
+            scoring_results = pd.concat([
+                self.scoring_df[[self.l['sce'],self.layer_0_label]],
+                pd.DataFrame(
+                    final_scores,
+                    index=self.scoring_df.index,
+                    columns=self.options_res_cols)],
+                axis=1).sort_values(
+                    [self.l['sce'],self.layer_0_label]).reset_index(drop=True)
+
+            scoring_results.columns.name = self.l['options']
 
-        self.scoring_df[self.l['min_score']] = \
-            self.score_limit_df.loc[0, self.l['min_score']]
+            res['scored_results'] = scoring_results
 
-        self.scoring_df[self.l['max_score']] = \
-            self.score_limit_df.loc[0, self.l['max_score']]
+        if return_shape in ['long', 'both']:
 
-        self.scoring_df_long=pd.melt(
-            self.scoring_df,
-            id_vars=self.scoring_df.columns.drop(options_res_cols),
-            value_vars=options_res_cols,
-            var_name=self.l['options'],
-            value_name='results')
+            # the long table lists the options of each scenario and
+            # layer 0 entity one after another, which is the row-major
+            # order of the score matrix
+            id_cols = self.scoring_df.columns.drop(self.options_res_cols)
 
-        linear_map = np.vectorize(self.linear_map)
+            self.scoring_df_long = self.scoring_df.set_index(
+                id_cols.tolist())[self.options_res_cols].rename_axis(
+                    columns=self.l['options']).stack(dropna=False).rename(
+                        'results').reset_index()
 
-        self.scoring_df_long[self.l['lin_score']] = linear_map(
-                self.scoring_df_long[self.l['hifi']],
-                self.scoring_df_long[self.l['lofi']],
-                self.scoring_df_long['results'],
-                self.scoring_df_long[self.l['min_score']],
-                self.scoring_df_long[self.l['max_score']],
-                ).round(decimals_in_scores)
+            self.scoring_df_long[self.l['lin_score']] = linear_scores.ravel()
 
-        self.apply_global_weight()
+            self.scoring_df_long[self.l['fnl_score']] = final_scores.ravel()
 
-        scoring_results = self.scoring_df_long.pivot(
-            columns=self.l['options'],
-            values=self.l['fnl_score'],
-            index=[self.l['sce'],self.layer_0_label]).reset_index()
+            res['scored_results_long'] = self.scoring_df_long
 
-        res = {
-            'scored_results' : scoring_results,
-            'scored_results_long' : self.scoring_df_long,
-        }
+        else:
+            # a long table from an earlier call no
+            # longer matches the current scores
+            self.scoring_df_long = None
 
         return res
 
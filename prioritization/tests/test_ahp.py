@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from pandas.testing import assert_series_equal, assert_frame_equal
 
@@ -151,6 +152,111 @@ class PriorityWeightsTests(unittest.TestCase):
             np.array([2.645751, 0.377964]).round(2)).all()
             )
 
+    def test_calc_priority_scores(self):
+        """Tests calculation of the priority scores from
+        a priority rating array.
+        """
+        res = self.ahp.calc_priority_scores(
+            np.array(self.priority_weight_dfs['layer_0b'].iloc[:,1:]),
+            'Layer 0/B Layer 1/B Layer 2',
+            'layer_0b')
+
+        self.assertTrue(
+            (res['priority_responses'].round(2)==\
+            np.array([[1., 9.], [0.11, 1.]])).all()
+            )
+
+        self.assertTrue(
+            (res['priority_scores'].round(2)==\
+            np.array([3., 0.33])).all()
+            )
+
+        self.assertTrue(
+            res['layer_labels']=={
+                'Layer 2' : 'B Layer 2', 'Layer 1' : 'B Layer 1'}
+            )
+
+        with self.assertRaisesRegex(ValueError, 'diagonal'):
+            self.ahp.calc_priority_scores(
+                np.array([[1, 9], ['leave empty', '']], dtype=object),
+                'Layer 0/B Layer 1/B Layer 2',
+                'layer_0b')
+
+    def test_calc_priority_vectors(self):
+        """Tests that the priority vectors of stacked priority
+        responses match those of each priority response array.
+        """
+        priority_responses = np.array([
+            [[1., 2., 4.],
+             [0., 1., 2.],
+             [0., 0., 1.]],
+            [[1., 9., 1/9],
+             [0., 1., 9.],
+             [0., 0., 1.]]])
+
+        stacked = self.ahp.calc_priority_vectors(priority_responses.copy())
+
+        for i in range(len(priority_responses)):
+            single = self.ahp.calc_priority_vectors(
+                priority_responses[i].copy())
+
+            for j in range(3):
+                self.assertTrue(np.allclose(stacked[j][i], single[j]))
+
+        self.assertTrue(np.allclose(stacked[1][0], [4/7, 2/7, 1/7]))
+        self.assertTrue(np.isclose(stacked[2][0], 3.))
+
+    def test_check_priority_matrix_consistency(self):
+        """Tests that inconsistent priority ratings, and priority
+        matrices of an order missing from the random index, are
+        reported.
+        """
+        priority_responses = np.array([
+            [1., 9., 1/9],
+            [1/9, 1., 9.],
+            [9., 1/9, 1.]])
+        _, _, eigenvalue = self.ahp.calc_priority_vectors(
+            priority_responses)
+
+        with self.assertRaisesRegex(ValueError, 'inconsistent'):
+            self.ahp.check_priority_matrix_consistency(
+                priority_responses, eigenvalue, 'layer_x')
+
+        self.ahp.random_index_by_order.pop(3)
+
+        with self.assertRaisesRegex(ValueError, 'order 3'):
+            self.ahp.check_priority_matrix_consistency(
+                priority_responses, eigenvalue, 'layer_x')
+
+    def test_check_priority_matrices_consistency(self):
+        """Tests that the batched consistency check reports
+        only the inconsistent priority ratings.
+        """
+        priority_responses = {
+            'layer_x' : np.array([
+                [1., 9., 1/9],
+                [1/9, 1., 9.],
+                [9., 1/9, 1.]]),
+            'layer_y' : np.array([
+                [1., 2., 4.],
+                [1/2, 1., 2.],
+                [1/4, 1/2, 1.]]),
+            'layer_z' : np.array([
+                [1., 7.],
+                [1/7, 1.]]),
+        }
+
+        with self.assertRaisesRegex(ValueError, r'table\(s\) layer_x '):
+            self.ahp.check_priority_matrices_consistency(
+                priority_responses)
+
+        priority_responses.pop('layer_x')
+
+        self.assertTrue(
+            self.ahp.check_priority_matrices_consistency(
+                priority_responses)
+            )
+
     def test_calculate(self):
         """Tests the full calculation of priority weights that 
         sum to one per each layer 2 entity, and overall.
@@ -168,6 +274,56 @@ class PriorityWeightsTests(unittest.TestCase):
             priority_weights[
                 'weights_per_top_layer_entities'].shape[0] == 8)
 
+    def test_calculate_incomplete_hierarchy(self):
+        """Tests that a priority rating table referring to an
+        upper layer entity without ratings is reported.
+        """
+        self.priority_weight_dfs['layer_0c'].columns = [
+            'Layer 0/A Layer 1/C Layer 2', 'C Layer 0', 'D Layer 0']
+
+        with self.assertRaisesRegex(ValueError, 'incomplete'):
+            self.ahp.calculate()
+
+    def test_calculate_weights_sum(self):
+        """Tests that a layer 1 entity left without layer 0 priority
+        ratings is reported, as its layer 2 entity weights do not sum
+        to one.
+        """
+        self.priority_weight_dfs.pop('layer_0c')
+
+        with self.assertRaisesRegex(ValueError, 'do not sum to 1'):
+            self.ahp.calculate()
+
+    def test_pickle(self):
+        """Tests that the priority weights calculation can be
+        pickled, for example to run it in a parallel process.
+        """
+        ahp = pickle.loads(pickle.dumps(self.ahp))
+
+        self.assertEqual(ahp.l, self.ahp.l)
+
+        assert_frame_equal(
+            ahp.calculate()['final_weights'],
+            self.ahp.calculate()['final_weights'])
+
+    def test_log_level_unchanged(self):
+        """Tests that the root logger level is left unchanged
+        unless a log level is passed.
+        """
+        logger = logging.getLogger()
+        log_level = logger.level
+
+        try:
+            logger.setLevel(logging.WARNING)
+
+            PriorityWeights(
+                self.priority_weight_dfs, self.ahp.random_index)
+
+            self.assertEqual(logger.level, logging.WARNING)
+
+        finally:
+            logger.setLevel(log_level)
+
     def test_plot_weights(self):
         """_summary_
         """
@@ -1,3 +1,4 @@
+import copy
 import unittest
 from pandas.testing import assert_series_equal, assert_frame_equal
 
@@ -20,10 +21,10 @@ class PrioritizerTests(unittest.TestCase):
     weight calculation class with its methods."""
 
     @classmethod
-    def setUp(self):
+    def setUpClass(cls):
         """Defines example priority rating input
         matrices by reading them from the test input 
-        file (see path below).
+        file (see path below), once for all tests.
         """
         logger = logging.getLogger()
         logger_filename = "prioritization_run.log"
@@ -32,12 +33,26 @@ class PrioritizerTests(unittest.TestCase):
         fh.setLevel(logging.DEBUG)
         logger.addHandler(fh)
 
-        self.inpath="prioritization/tests/test_input.xlsx"
+        cls.inpath="prioritization/tests/test_input.xlsx"
 
-        self.prioritizer = Prioritizer(
-            inpath=self.inpath,
+        cls.read_prioritizer = Prioritizer(
+            inpath=cls.inpath,
             writeout=False)
 
+    def setUp(self):
+        """Provides each test with its own prioritizer,
+        sharing the input tables that were read only once.
+        """
+        self.prioritizer = copy.copy(self.read_prioritizer)
+
+    def test_read_inputs_missing_file(self):
+        """Tests that a missing input file raises a ValueError.
+        """
+        with self.assertRaisesRegex(ValueError, 'Failed to read'):
+            Prioritizer(
+                inpath="prioritization/tests/missing_input.xlsx",
+                writeout=False)
+
     def test_calculate(self):
         """Tests prioritization process.
         """
@@ -70,3 +85,99 @@ class PrioritizerTests(unittest.TestCase):
         else:
             print(self.prioritizer.scores_and_weights)
 
+
+    def test_rank_number_of_bins(self):
+        """Tests that the rating bins span the range up to
+        the maximum final score for any number of bins.
+        """
+        self.prioritizer.calculate()
+
+        ranking_bin_labels = ['red', 'orange', 'yellow', 'green']
+
+        self.prioritizer.rank(
+            number_of_ranking_bins=4,
+            ranking_bin_labels=ranking_bin_labels,
+            lower_ranking_limit_0=True)
+
+        for summed_and_ranked, score_label in [
+            (self.prioritizer.scores_and_weights['summed_and_ranked'],
+             'Weighted Score'),
+            (self.prioritizer.scores_and_weights_top_layer[
+                'summed_and_ranked'], 'Final Weighted Score')]:
+
+            self.assertFalse(summed_and_ranked['Bin'].isna().any())
+
+            self.assertEqual(
+                summed_and_ranked.loc[
+                    summed_and_ranked[score_label].idxmax(), 'Bin'],
+                'green')
+
+    def test_bin_scores(self):
+        """Tests that the scores are binned as by pandas.cut.
+        """
+        labels = ['red', 'yellow', 'green']
+
+        scores = np.array([0., 0.5, 1., 1.5, 2.25, 3., 3.5])
+
+        for bins in [np.linspace(0., 3., 4), 3]:
+            assert_series_equal(
+                pd.Series(Prioritizer.bin_scores(scores, bins, labels)),
+                pd.Series(pd.cut(scores, bins, labels=labels)))
+
+        assert_series_equal(
+            pd.Series(Prioritizer.bin_scores(np.ones(4), 3, labels)),
+            pd.Series(pd.cut(np.ones(4), 3, labels=labels)))
+
+        # edges of non positive maximum scores with the lower
+        # ranking limit at 0 are repeated or decreasing
+        for bins in [np.zeros(4), np.linspace(0., -3., 4)]:
+            with self.assertRaises(ValueError):
+                pd.cut(scores, bins, labels=labels)
+
+            with self.assertRaisesRegex(ValueError, 'Bin edges'):
+                Prioritizer.bin_scores(scores, bins, labels)
+
+    def test_calculate_repeated(self):
+        """Tests that repeated calculations only repeat the
+        ranking, unless the cache is reset.
+        """
+        self.prioritizer.calculate()
+
+        scores_and_weights_long = self.prioritizer.scores_and_weights['long']
+
+        self.prioritizer.number_of_ranking_bins = 2
+        self.prioritizer.ranking_bin_labels = ['red', 'green']
+        self.prioritizer.calculate()
+
+        self.assertIs(
+            self.prioritizer.scores_and_weights['long'],
+            scores_and_weights_long)
+
+        self.assertEqual(
+            set(self.prioritizer.scores_and_weights[
+                'summed_and_ranked']['Bin']),
+            {'red', 'green'})
+
+        self.prioritizer.reset_cache()
+        self.prioritizer.calculate()
+
+        self.assertIsNot(
+            self.prioritizer.scores_and_weights['long'],
+            scores_and_weights_long)
+
+        # reloading the inputs discards the previous calculation
+        scores_and_weights_long = self.prioritizer.scores_and_weights['long']
+
+        self.prioritizer.inpath = \
+            "prioritization/tests/test_input_3_scenarios_4_options.xlsx"
+        self.prioritizer.read_inputs(False)
+        self.prioritizer.set_up_inputs()
+        self.prioritizer.calculate()
+
+        self.assertIsNot(
+            self.prioritizer.scores_and_weights['long'],
+            scores_and_weights_long)
+
+        self.assertEqual(
+            self.prioritizer.scores_and_weights['long'][
+                'Options'].nunique(), 4)
@@ -93,6 +93,23 @@ class MetricScoreTests(unittest.TestCase):
 
         self.assertTrue(val, lofi)
 
+    def test_linear_map_arrays(self):
+        """Tests linear score map applied to arrays.
+        """
+        hifi = np.array([20., 20., 20., 5.])
+        lofi = np.array([11., 11., 11., 5.])
+        values = np.array([15., 22., 3., 7.])
+
+        scores = self.scoring.linear_map(hifi, lofi, values, 1, 10)
+
+        np.testing.assert_allclose(scores, [5., 10., 1., 1.])
+
+        for i in range(3):
+            self.assertAlmostEqual(
+                scores[i],
+                self.scoring.linear_map(
+                    hifi[i], lofi[i], values[i], 1, 10))
+
     def test_determine_limits(self):
         """Tests the determination of score
         limits.
@@ -126,6 +143,43 @@ class MetricScoreTests(unittest.TestCase):
                 self.scoring_df[self.l['lofi']]!=self.l['min'],self.l['lofi']]).all()
         )
 
+    def test_determine_limits_min_max(self):
+        """Tests that the min and max filters are the extremes
+        of the quantification results only, across the options
+        and the scenarios.
+        """
+        filters = self.scoring.scoring_df.set_index(
+            ['Scenario', 'Layer 0'])
+
+        # A Layer 0 results range from 5 to 15, the global
+        # weight of 1 is not a quantification result
+        self.assertEqual(
+            filters.loc[('Scenario A', 'A Layer 0'), self.l['lofi']], 5)
+        self.assertEqual(
+            filters.loc[('Scenario B', 'A Layer 0'), self.l['hifi']], 15)
+        self.assertEqual(
+            filters.loc[('Scenario B', 'D Layer 0'), self.l['hifi']], 6)
+
+    def test_determine_limits_other_table(self):
+        """Tests that the limits of a table other than the one
+        passed on initialization use the options of that table.
+        """
+        scoring_df = self.scoring_df.copy()
+        scoring_df['Option 4'] = [20, 5, 5, 5, 5, 5, 5, 5]
+
+        filters = self.scoring.determine_limits(
+            scoring_df).set_index(['Scenario', 'Layer 0'])
+
+        self.assertEqual(
+            filters.loc[('Scenario B', 'A Layer 0'), self.l['hifi']], 20)
+
+        filters = self.scoring.determine_limits(
+            self.scoring_df.drop(columns='Option 3')).set_index(
+                ['Scenario', 'Layer 0'])
+
+        self.assertEqual(
+            filters.loc[('Scenario B', 'A Layer 0'), self.l['hifi']], 15)
+
     def test_score_results(self):
         """Tests the results scoring.
         """
@@ -141,3 +195,58 @@ class MetricScoreTests(unittest.TestCase):
         )
     
 
+
+    def test_score_results_return_shape(self):
+        """Tests that only the requested shapes of the
+        scored results are returned.
+        """
+        res = self.scoring.score_results()
+
+        wide = self.scoring.score_results(return_shape='wide')
+
+        self.assertEqual(list(wide), ['scored_results'])
+        self.assertIsNone(self.scoring.scoring_df_long)
+        assert_frame_equal(wide['scored_results'], res['scored_results'])
+
+        long = self.scoring.score_results(return_shape='long')
+
+        self.assertEqual(list(long), ['scored_results_long'])
+        assert_frame_equal(
+            long['scored_results_long'], res['scored_results_long'])
+
+        with self.assertRaises(ValueError):
+            self.scoring.score_results(return_shape='pivoted')
+
+    def test_score_results_repeated(self):
+        """Tests that repeated scoring leaves earlier
+        results intact.
+        """
+        res = self.scoring.score_results()
+
+        scored_results = res['scored_results'].copy()
+        scored_results_long = res['scored_results_long'].copy()
+
+        self.scoring.score_results(decimals_in_scores=2)
+
+        assert_frame_equal(res['scored_results'], scored_results)
+        assert_frame_equal(
+            res['scored_results_long'], scored_results_long)
+
+    def test_score_results_missing_result(self):
+        """Tests that a missing quantification result keeps
+        its row in the long scored results.
+        """
+        scoring_df = self.scoring_df.copy()
+        scoring_df.loc[0, 'Option 1'] = np.nan
+
+        res = MetricScore(
+            scoring_df,
+            self.score_limit_df,
+            'Layer 0').score_results()
+
+        self.assertEqual(
+            res['scored_results'].shape[0]*3,
+            res['scored_results_long'].shape[0])
+
+        self.assertEqual(
+            res['scored_results_long']['results'].isna().sum(), 1)